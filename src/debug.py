@@ -7,15 +7,31 @@ class DummyPixels:
     def __init__(self, pin, num_pixels, brightness=1.0, auto_write=False):
         self.num_pixels = num_pixels
         self.brightness = brightness
-        self.leds = [(0, 0, 0)] * num_pixels
+        # Packed RGB buffer, three bytes per pixel like the real NeoPixel buffer
+        self.leds = bytearray(num_pixels * 3)
+
+    def _color_bytes(self, value):
+        # Packed 0xRRGGBB ints are accepted like on the real NeoPixel
+        if isinstance(value, int):
+            return value.to_bytes(3, "big")
+        color = bytes(value)
+        if len(color) != 3:
+            raise ValueError("Expected tuple of length 3")
+        return color
 
     def __setitem__(self, idx, value):
+        if isinstance(idx, slice):
+            indices = range(*idx.indices(self.num_pixels))
+            if len(value) != len(indices):
+                raise ValueError("Slice and input sequence size do not match.")
+            for i, color in zip(indices, value):
+                self[i] = color
+            return
         if 0 <= idx < self.num_pixels:
-            self.leds[idx] = value
+            self.leds[idx * 3:idx * 3 + 3] = self._color_bytes(value)
 
     def show(self):
         pass
 
     def fill(self, value):
-        self.leds = [value] * self.num_pixels
-        pass
+        self.leds[:] = self._color_bytes(value) * self.num_pixels
@@ -1,24 +1,79 @@
+import os
+import json
 
-def get_track_path(track_path: list) -> list:
-    """Extract only the LED positions from track path, excluding utils"""
-    positions = []
+try:
+    # Optional faster parser, its JSONDecodeError subclasses json.JSONDecodeError
+    import orjson
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+
+def load_json(path: str):
+    """Load and parse a single JSON file"""
+    with open(path, 'rb') as f:
+        return json_loads(f.read())
+
+
+def find_duplicate_ids(files: list[str], items: list[dict]) -> list[tuple[str, str, str]]:
+    """Find loaded items sharing an id, as (id, first file, duplicate file)"""
+    seen_files = {}
+    duplicates = []
+    for path, item in zip(files, items):
+        if 'id' not in item:
+            continue
+        item_id = item['id']
+        if item_id in seen_files:
+            duplicates.append((item_id, os.path.basename(seen_files[item_id]), os.path.basename(path)))
+        else:
+            seen_files[item_id] = path
+    return duplicates
+
+
+def canonicalize_track_path(track_path: list) -> list[tuple[int, tuple[str, ...]]]:
+    """Normalize every track path step to a (led, utils) tuple"""
+    steps = []
     for step in track_path:
         if isinstance(step, list) and len(step) > 0:
-            positions.append(step[0])
+            led = step[0]
+            utils = step[1] if len(step) > 1 else None
+        else:
+            led = step
+            utils = None
+
+        # Handle both single util and list of utils uniformly, skipping empty entries
+        if isinstance(utils, list):
+            utils = tuple(util_id for util_id in utils if util_id)
+        elif utils:
+            utils = (utils,)
         else:
-            positions.append(step)
-    return positions
+            utils = ()
+        steps.append((led, utils))
+    return steps
 
 
-def count_track_utils(track_path: list) -> int:
-    """Count the total number of utils that will be triggered in a track"""
-    total_utils = 0
-    for step in track_path:
-        if isinstance(step, list) and len(step) > 1:
-            # Second element contains utils list
-            utils = step[1] if len(step) > 1 else []
-            if isinstance(utils, list):
-                total_utils += len(utils)
-            elif utils:  # Single util (not a list)
-                total_utils += 1
-    return total_utils
+def wheel(pos: int) -> tuple[int, int, int]:
+    """Generate rainbow colors across 0-255 positions"""
+    if pos < 85:
+        return (int(pos * 3), int(255 - pos * 3), 0)
+    elif pos < 170:
+        pos -= 85
+        return (int(255 - pos * 3), 0, int(pos * 3))
+    else:
+        pos -= 170
+        return (0, int(pos * 3), int(255 - pos * 3))
+
+
+# wheel() only has 256 distinct inputs, so animations index this table instead
+WHEEL_LUT = tuple(wheel(pos) for pos in range(256))
+
+
+def scaled_wheel(brightness: float) -> tuple[tuple[int, int, int], ...]:
+    """WHEEL_LUT with brightness already applied to every color"""
+    return tuple((int(r * brightness), int(g * brightness), int(b * brightness)) for r, g, b in WHEEL_LUT)
+
+
+def rainbow_phases(pixel_length: int) -> tuple[int, ...]:
+    """Wheel position of each pixel, spreading one rainbow across the strip"""
+    # Each pixel's position on the wheel only depends on its index
+    return tuple(i * 256 // pixel_length for i in range(pixel_length))
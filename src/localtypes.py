@@ -19,8 +19,9 @@ class TrackType(TypedDict):
     """Track structure for LED animations"""
     id:  str
     name: str
-    track_path: list[int]
+    track_path: list[int | list[int | str | list[str]]]  # led, or [led] / [led, util id(s)]
     speed: int
+    steps: list[tuple[int, tuple[str, ...]]]  # added by the loader from track_path
 
 
 class UtilsType(TypedDict):
@@ -4,9 +4,10 @@ import sys
 import json
 import time
 import random
-import multiprocessing
+import threading
+from queue import Queue
 from typing import Tuple
-from helpfunctions import count_track_utils, get_track_path
+from helpfunctions import canonicalize_track_path, find_duplicate_ids, load_json, rainbow_phases, scaled_wheel
 from localtypes import ConfigType, TrackType, UtilsType
 
 
@@ -37,6 +38,18 @@ global TRIGGER_UTILS
 TRIGGER_UTILS: list[UtilsType] = []
 global RANDOM_UTILS
 RANDOM_UTILS: list[UtilsType] = []
+# Id lookups
+global TRACKS_BY_ID
+TRACKS_BY_ID: dict[str, TrackType] = {}
+global UTILS_BY_ID
+UTILS_BY_ID: dict[str, UtilsType] = {}
+# Color table names used by the code itself, checked against the table at boot
+TRACK_PATH_COLOR = "white"
+TRACK_TRAIN_COLOR = "red"
+OFF_COLOR = "off"
+STATUS_BOOT_COLOR = "status_indicator_yellow"
+STATUS_READY_COLOR = "status_indicator_green"
+CODE_COLORS = (TRACK_PATH_COLOR, TRACK_TRAIN_COLOR, OFF_COLOR, STATUS_BOOT_COLOR, STATUS_READY_COLOR)
 
 # HANDLE CONFIG
 
@@ -55,36 +68,47 @@ def fetch_config() -> ConfigType:
     print(f"Using config from: {config_path}")
     if config_path:
         try:
-            with open(config_path, 'r') as f:
-                config = json.load(f)
-                track_pixel_length = config.get("TRACK_PIXEL_LENGTH", 0)
-                util_pixel_length = config.get("UTIL_PIXEL_LENGTH", 0)
-                track_pin = config.get("TRACK_PIN", "")
-                util_pin = config.get("UTIL_PIN", "")
-                status_util_led = config.get("STATUS_UTIL_LED", 0)
-                brightness = config.get("BRIGHTNESS", 0.2)
-                track_speed_modifier = config.get("TRACK_SPEED_MODIFIER", 1.0)
-                random_util_trigger_chance = config.get(
-                    "RANDOM_UTIL_TRIGGER_CHANCE", 0)
-                color_table = config.get("COLOR_TABLE", {})
-
-                return ConfigType(
-                    track_pixel_length=track_pixel_length,
-                    util_pixel_length=util_pixel_length,
-                    track_pin=track_pin,
-                    util_pin=util_pin,
-                    status_util_led=status_util_led,
-                    brightness=brightness,
-                    track_speed_modifier=track_speed_modifier,
-                    random_util_trigger_chance=random_util_trigger_chance,
-                    color_table=color_table
-                )
+            config = load_json(config_path)
+            track_pixel_length = config.get("TRACK_PIXEL_LENGTH", 0)
+            util_pixel_length = config.get("UTIL_PIXEL_LENGTH", 0)
+            track_pin = config.get("TRACK_PIN", "")
+            util_pin = config.get("UTIL_PIN", "")
+            status_util_led = config.get("STATUS_UTIL_LED", 0)
+            brightness = config.get("BRIGHTNESS", 0.2)
+            track_speed_modifier = config.get("TRACK_SPEED_MODIFIER", 1.0)
+            random_util_trigger_chance = config.get(
+                "RANDOM_UTIL_TRIGGER_CHANCE", 0)
+            color_table = config.get("COLOR_TABLE", {})
+
+            return ConfigType(
+                track_pixel_length=track_pixel_length,
+                util_pixel_length=util_pixel_length,
+                track_pin=track_pin,
+                util_pin=util_pin,
+                status_util_led=status_util_led,
+                brightness=brightness,
+                track_speed_modifier=track_speed_modifier,
+                random_util_trigger_chance=random_util_trigger_chance,
+                color_table=color_table
+            )
         except json.JSONDecodeError:
             print("\033[91mERROR: Decoding config file.\033[0m")
     print("\033[91mERROR: Config file not found in ScriptRoot or ~/.config/trailpixel/.\033[0m")
     sys.exit(1)
 
 
+def scale_color_table(color_table: dict) -> dict[str, Tuple[int, int, int]]:
+    # Colors are fixed after load, so apply each color's brightness once here
+    scaled_color_table = {}
+    for name, value in color_table.items():
+        try:
+            r, g, b, brightness = value
+            scaled_color_table[name] = (int(r * brightness), int(g * brightness), int(b * brightness))
+        except (TypeError, ValueError):
+            print(f"\033[93mWARNING: Invalid color '{name}' in color table, expected [r, g, b, brightness]\033[0m")
+    return scaled_color_table
+
+
 # GLOBAL VARIABLES
 config = fetch_config()
 TRACK_PIXEL_LENGTH = config["track_pixel_length"]
@@ -96,6 +120,7 @@ BRIGHTNESS = config["brightness"]
 TRACK_SPEED_MODIFIER = config["track_speed_modifier"]
 RANDOM_UTIL_TRIGGER_CHANCE = config["random_util_trigger_chance"]
 COLOR_TABLE = config["color_table"]
+SCALED_COLOR_TABLE = scale_color_table(COLOR_TABLE)
 
 
 try:
@@ -137,56 +162,67 @@ except Exception as error:
     u_pixels = DummyPixels(UTIL_PIN, UTIL_PIXEL_LENGTH,
                            brightness=BRIGHTNESS, auto_write=False)
 
+# Last color written to each util LED, used to skip writes and shows that change nothing
+u_pixel_state = [(0, 0, 0)] * UTIL_PIXEL_LENGTH
+
 
 # INIT AND BOOT FUNCTIONS
+BOOT_FRAME_DELAY = 0.05
+
+
 def boot_startup_sequence():
     global TRACKS
     global INIT_UTILS
     global TRIGGER_UTILS
     global RANDOM_UTILS
+    global TRACKS_BY_ID
+    global UTILS_BY_ID
 
     print("\033[1mInitializing...\033[0m")
-    track_queue = multiprocessing.Queue()
-    util_queue = multiprocessing.Queue()
-    track_proc = multiprocessing.Process(
-        target=track_build_init, args=(track_queue,))
-    util_proc = multiprocessing.Process(
-        target=util_build_init, args=(util_queue,))
-    track_proc.start()
-    util_proc.start()
-
-    # Run boot animation until both processes are done
+    # Loading is only file reads, so threads avoid the fork and pickling of a process
+    track_queue = Queue()
+    util_queue = Queue()
+    track_thread = threading.Thread(
+        target=track_build_init, args=(track_queue,), daemon=True)
+    util_thread = threading.Thread(
+        target=util_build_init, args=(util_queue,), daemon=True)
+    track_thread.start()
+    util_thread.start()
+
+    # Run boot animation until both loaders are done
     boot_anim_frame = 0
 
-    def wheel(pos):
-        if pos < 85:
-            return (int(pos * 3), int(255 - pos * 3), 0)
-        elif pos < 170:
-            pos -= 85
-            return (int(255 - pos * 3), 0, int(pos * 3))
-        else:
-            pos -= 170
-            return (0, int(pos * 3), int(255 - pos * 3))
-    while track_proc.is_alive() or util_proc.is_alive():
-        for i in range(TRACK_PIXEL_LENGTH):
-            pixel_index = (i * 256 // TRACK_PIXEL_LENGTH) + boot_anim_frame * 8
-            r, g, b = wheel(pixel_index & 255)
-            brightness = 0.2
-            t_pixels[i] = (int(r * brightness),
-                           int(g * brightness), int(b * brightness))
+    pixel_phases = rainbow_phases(TRACK_PIXEL_LENGTH)
+
+    # Dim the wheel once up front rather than scaling every pixel of every frame
+    boot_wheel = scaled_wheel(0.2)
+
+    # Advancing 8 wheel positions per frame repeats after 32 frames, so render them all once
+    boot_frames = [[boot_wheel[(phase + offset) & 255] for phase in pixel_phases]
+                   for offset in range(0, 256, 8)]
+
+    def draw_boot_frame(frame):
+        # Assign the whole strip at once instead of one pixel at a time
+        t_pixels[:] = boot_frames[frame % len(boot_frames)]
         t_pixels.show()
+
+    next_frame = time.monotonic()
+    while track_thread.is_alive() or util_thread.is_alive():
+        draw_boot_frame(boot_anim_frame)
         boot_anim_frame += 1
-        wait(0.05)
+        next_frame = max(next_frame + BOOT_FRAME_DELAY, time.monotonic())
+        wait_until(next_frame)
 
-    # Ensure both processes are joined
-    track_proc.join()
-    util_proc.join()
+    # Ensure both loaders are joined
+    track_thread.join()
+    util_thread.join()
 
-    if track_proc.exitcode != 0:
-        print("Track process failed. Exiting.")
+    # A loader that failed never hands back a result
+    if track_queue.empty():
+        print("Track loading failed. Exiting.")
         sys.exit(1)
-    if util_proc.exitcode != 0:
-        print("Event process failed. Exiting.")
+    if util_queue.empty():
+        print("Util loading failed. Exiting.")
         sys.exit(1)
 
     TRACKS = track_queue.get()
@@ -194,45 +230,30 @@ def boot_startup_sequence():
 
     # Continue rainbow animation while processing is finishing
     print("  Processing complete...")
+    next_frame = time.monotonic()
     for _ in range(20):  # A few more rainbow cycles
-        for i in range(TRACK_PIXEL_LENGTH):
-            pixel_index = (i * 256 // TRACK_PIXEL_LENGTH) + boot_anim_frame * 8
-            r, g, b = wheel(pixel_index & 255)
-            brightness = 0.2
-            t_pixels[i] = (int(r * brightness),
-                           int(g * brightness), int(b * brightness))
-        t_pixels.show()
+        draw_boot_frame(boot_anim_frame)
         boot_anim_frame += 1
-        wait(0.05)
+        next_frame = max(next_frame + BOOT_FRAME_DELAY, time.monotonic())
+        wait_until(next_frame)
 
-    # Check for Track and Util id conflicts
     print("  Validating tracks and utils configuration...")
-    track_ids = [track.get('id') for track in TRACKS]
-    if len(track_ids) != len(set(track_ids)):
-        # Find and report the duplicate track IDs
-        seen_ids = set()
-        duplicate_ids = set()
-        for track_id in track_ids:
-            if track_id in seen_ids:
-                duplicate_ids.add(track_id)
-            else:
-                seen_ids.add(track_id)
-        print(f"  \033[91mERROR: Duplicate track IDs found in tracks.d folder: {', '.join(duplicate_ids)}\033[0m")
-        sys.exit(1)
-    util_ids = [util['id'] for util in INIT_UTILS + TRIGGER_UTILS + RANDOM_UTILS if 'id' in util]
-    if len(util_ids) != len(set(util_ids)):
-        # Find and report the duplicate util IDs
-        seen_ids = set()
-        duplicate_ids = set()
-        for util_id in util_ids:
-            if util_id in seen_ids:
-                duplicate_ids.add(util_id)
-            else:
-                seen_ids.add(util_id)
-        print(f"  \033[91mERROR: Duplicate util IDs found in utils.d folder: {', '.join(duplicate_ids)}\033[0m")
-        sys.exit(1)
+    # Check every color name once here so LED writes can skip the check
+    used_colors = set(CODE_COLORS)
+    for util in INIT_UTILS + TRIGGER_UTILS + RANDOM_UTILS:
+        # Malformed items are left for run_util_by_id to report when they fire
+        used_colors.update(item['color'] for item in util.get('utils', [])
+                           if isinstance(item, dict) and isinstance(item.get('color'), str))
+    unknown_colors = sorted(used_colors - SCALED_COLOR_TABLE.keys())
+    if unknown_colors:
+        print(f"  \033[93mWARNING: Colors not found in color table, using default (off): "
+              f"{', '.join(unknown_colors)}\033[0m")
     print("  Validation completed.")
 
+    # Ids are unique at this point, so index them once for constant time lookups
+    TRACKS_BY_ID = {track['id']: track for track in TRACKS if 'id' in track}
+    UTILS_BY_ID = {util['id']: util for util in INIT_UTILS + TRIGGER_UTILS + RANDOM_UTILS if 'id' in util}
+
     # Turn off LEDs after boot animation
     t_pixels.fill((0, 0, 0))
     t_pixels.show()
@@ -257,22 +278,30 @@ def track_build_init(queue) -> None:
             selected_tracks_dir = tracks_dir
             break
 
+    tracks = []
     if selected_tracks_dir:
         print(f"  Loading tracks tracks from: {selected_tracks_dir}")
 
-        for filename in os.listdir(selected_tracks_dir):
-            if filename.endswith(".json"):
-                with open(os.path.join(selected_tracks_dir, filename), 'r') as f:
-                    track = json.load(f)
-                    TRACKS.append(track)
+        with os.scandir(selected_tracks_dir) as entries:
+            track_files = [entry.path for entry in entries
+                           if entry.is_file() and entry.name.endswith(".json")]
+        tracks = [load_json(path) for path in track_files]
+        for track in tracks:
+            track['steps'] = canonicalize_track_path(track.get('track_path', []))
+
+        duplicates = find_duplicate_ids(track_files, tracks)
+        if duplicates:
+            for track_id, first_file, duplicate_file in duplicates:
+                print(f"  \033[91mERROR: Duplicate track ID '{track_id}' in {first_file} and {duplicate_file}\033[0m")
+            return
 
-    if len(TRACKS) == 0:
+    if len(tracks) == 0:
         print("  \033[91mWARNING: No tracks found in any tracks.d folder exiting\033[0m")
         print(f"  Searched locations: {', '.join(tracks_dirs)}")
-        sys.exit(1)
+        return
 
-    queue.put(TRACKS)
-    print(f"  {len(TRACKS)} tracks have been detected and added")
+    queue.put(tracks)
+    print(f"  {len(tracks)} tracks have been detected and added")
 
 
 def util_build_init(queue) -> None:
@@ -295,11 +324,16 @@ def util_build_init(queue) -> None:
         if selected_utils_dir:
             print(f"  Loading utils from: {selected_utils_dir}")
 
-            for filename in os.listdir(selected_utils_dir):
-                if filename.endswith(".json"):
-                    with open(os.path.join(selected_utils_dir, filename), 'r') as f:
-                        util = json.load(f)
-                        all_utils.append(util)
+            with os.scandir(selected_utils_dir) as entries:
+                util_files = [entry.path for entry in entries
+                              if entry.is_file() and entry.name.endswith(".json")]
+            all_utils = [load_json(path) for path in util_files]
+
+            duplicates = find_duplicate_ids(util_files, all_utils)
+            if duplicates:
+                for util_id, first_file, duplicate_file in duplicates:
+                    print(f"  \033[91mERROR: Duplicate util ID '{util_id}' in {first_file} and {duplicate_file}\033[0m")
+                return
 
         if len(all_utils) == 0:
             print("  \033[91mWARNING: No utils found in any utils.d folder\033[0m")
@@ -373,10 +407,7 @@ def execute_init_utils():
 # LED FUNCTIONS
 def set_t_led(led_index: int, color_name: str, show: bool = False) -> int:
     try:
-        r, g, b, brightness = get_color(color_name)
-
-        t_pixels[led_index] = (int(r * brightness),
-                               int(g * brightness), int(b * brightness))
+        t_pixels[led_index] = get_color(color_name)
         if show:
             t_pixels.show()
         return 0
@@ -387,10 +418,13 @@ def set_t_led(led_index: int, color_name: str, show: bool = False) -> int:
 
 def set_u_led(led_index: int, color_name: str, show: bool = False) -> int:
     try:
-        r, g, b, brightness = get_color(color_name)
+        color = get_color(color_name)
+        # Unknown names resolve to off, which is not the state the caller asked for
+        if color_name in SCALED_COLOR_TABLE and u_pixel_state[led_index] == color:
+            return 4
 
-        u_pixels[led_index] = (int(r * brightness),
-                               int(g * brightness), int(b * brightness))
+        u_pixels[led_index] = color
+        u_pixel_state[led_index] = color
         if show:
             u_pixels.show()
         return 0
@@ -419,23 +453,24 @@ def wait(time_in_seconds: float) -> int:
     return 0
 
 
-def get_color(name: str) -> Tuple[int, int, int, int]:
-    # Default to off if not found
-    if name not in COLOR_TABLE:
-        print(f"\033[93mWARNING: Color '{name}' not found in color table, using default (off)\033[0m")
-    return COLOR_TABLE.get(name, (0, 0, 0, 0))
+def wait_until(deadline: float) -> int:
+    # Sleep only the time left until a time.monotonic() deadline so that
+    # work done between waits does not accumulate as drift
+    return wait(max(0, deadline - time.monotonic()))
+
+
+def get_color(name: str) -> Tuple[int, int, int]:
+    # Default to off if not found, unknown names are reported once during boot validation
+    return SCALED_COLOR_TABLE.get(name, (0, 0, 0))
 
 
 # Utility Functions
 def get_random_util() -> UtilsType:
-    return RANDOM_UTILS[random.randint(0, len(RANDOM_UTILS) - 1)]
+    return random.choice(RANDOM_UTILS)
 
 
 def get_util_from_id(id: str) -> UtilsType | None:
-    for util in INIT_UTILS + TRIGGER_UTILS + RANDOM_UTILS:
-        if util.get('id') == id:
-            return util
-    return None
+    return UTILS_BY_ID.get(id)
 
 
 def run_util_by_id(util_id: str) -> int:
@@ -472,6 +507,8 @@ def run_util_by_id(util_id: str) -> int:
             if result == 0:
                 print(f"    \033[2mPreparing util LED {led_index} to {color_name}\033[0m")
                 led_changes_made = True
+            elif result == 4:
+                print(f"    \033[2mUtil LED {led_index} already {color_name}\033[0m")
             else:
                 print(f"      \033[93mWARNING: Failed to set util LED {led_index}\033[0m")
 
@@ -501,14 +538,11 @@ def run_util_by_id(util_id: str) -> int:
 
 # Track Functions
 def get_random_track() -> TrackType:
-    return TRACKS[random.randint(0, len(TRACKS) - 1)]
+    return random.choice(TRACKS)
 
 
 def get_track_by_id(track_id: str) -> TrackType | None:
-    for track in TRACKS:
-        if track.get('id') == track_id:
-            return track
-    return None
+    return TRACKS_BY_ID.get(track_id)
 
 
 def run_random_track() -> int:
@@ -520,9 +554,9 @@ def run_random_track() -> int:
         print(f"  Selected track: {track_config.get('name', 'Unknown')} ({track_config.get('id', 'Unknown')})")
 
         # Initialize path led path
-        track_path = track_config.get('track_path', [])
-        track_positions = get_track_path(track_path)
-        utils_count = count_track_utils(track_path)
+        track_steps = track_config['steps']
+        track_positions = [track for track, _ in track_steps]
+        utils_count = sum(len(track_utils) for _, track_utils in track_steps)
 
         print(f"  Path:      {track_positions}")
         print(f"  Utils:     {utils_count} util(s) will be triggered")
@@ -531,52 +565,43 @@ def run_random_track() -> int:
 
         # Enabling track
         print(f"  Enabling track LED", end="")
-        for i in track_config.get('track_path', []):
-            track = -1
-
-            if isinstance(i, list) and len(i) > 0:
-                track = i[0]
-            else:
-                track = i
-
+        for track, _ in track_steps:
             if track != -1:
                 print(f" {track}", end="")
-                set_t_led(track, "white", show=False)
+                set_t_led(track, TRACK_PATH_COLOR, show=False)
         print("")
         t_pixels.show()
 
         # Travel the track
-        for i in track_config['track_path']:
-            track = -1
-
-            if isinstance(i, list) and len(i) > 0:
-                track = i[0]
-                track_util = i[1] if len(i) > 1 else None
-            else:
-                track = i
-                track_util = None
+        previous_track = -1
+        step_delay = 10 * TRACK_SPEED_MODIFIER
+        next_step = time.monotonic()
+        for track, track_utils in track_steps:
+            # Turn off previous LED (simulate movement) in the same show as the next one
+            if previous_track != -1:
+                set_t_led(previous_track, OFF_COLOR, show=False)
 
-            # Trigger any utils for this step
             if track != -1:
                 print(f"  Traveling to track LED {track}")
-                set_t_led(track, "red", show=True)
+                set_t_led(track, TRACK_TRAIN_COLOR, show=False)
             else:
                 print(f"  Traveling is paused and waiting {track}")
 
-            # Execute any utils for this step
-            if track_util:
-                # Handle both single util and list of utils uniformly
-                utils_to_run = track_util if isinstance(track_util, list) else [track_util]
+            if previous_track != -1 or track != -1:
+                t_pixels.show()
+            previous_track = track
 
-                for util_id in utils_to_run:
-                    if util_id:  # Skip empty/None entries
-                        run_util_by_id(util_id)
+            # Execute any utils for this step
+            for util_id in track_utils:
+                run_util_by_id(util_id)
 
-            wait(10 * TRACK_SPEED_MODIFIER)
+            # Keep a steady tempo, but never try to catch up on a step that overran
+            next_step = max(next_step + step_delay, time.monotonic())
+            wait_until(next_step)
 
-            # Turn off previous LED (simulate movement)
-            if track != -1:
-                set_t_led(track, "off", show=True)
+        # Turn off the last LED once the track is done
+        if previous_track != -1:
+            set_t_led(previous_track, OFF_COLOR, show=True)
 
     except KeyboardInterrupt:
         exit_gracefully()
@@ -594,7 +619,7 @@ def main():
         print(f"  Pin:    {TRACK_PIN} on track, {UTIL_PIN} on utils")
         print("")
 
-        set_u_led(STATUS_UTIL_LED, "status_indicator_yellow", show=True)
+        set_u_led(STATUS_UTIL_LED, STATUS_BOOT_COLOR, show=True)
 
         boot_startup_sequence()
         print()
@@ -603,7 +628,7 @@ def main():
         execute_init_utils()
 
         # Trigger status utility light
-        set_u_led(STATUS_UTIL_LED, "status_indicator_green", show=True)
+        set_u_led(STATUS_UTIL_LED, STATUS_READY_COLOR, show=True)
 
         # MAIN LOOP
         print("\nStarting main track loop")
@@ -2,6 +2,7 @@
 import time
 import multiprocessing
 import sys
+from helpfunctions import rainbow_phases, scaled_wheel
 
 # Configuration
 TRACK_PIN = "D19"
@@ -9,6 +10,7 @@ UTIL_PIN = "D26"
 TRACK_PIXEL_LENGTH = 41
 UTIL_PIXEL_LENGTH = 43
 BRIGHTNESS = 0.3
+FRAME_DELAY = 0.05
 
 try:
     import board
@@ -33,16 +35,8 @@ except Exception as error:
     UTIL_PIN_OBJ = getattr(board, UTIL_PIN)
 
 
-def wheel(pos):
-    """Generate rainbow colors across 0-255 positions."""
-    if pos < 85:
-        return (int(pos * 3), int(255 - pos * 3), 0)
-    elif pos < 170:
-        pos -= 85
-        return (int(255 - pos * 3), 0, int(pos * 3))
-    else:
-        pos -= 170
-        return (0, int(pos * 3), int(255 - pos * 3))
+# Rainbow colors with BRIGHTNESS already applied, so frames are pure lookups
+SCALED_WHEEL_LUT = scaled_wheel(BRIGHTNESS)
 
 
 def rainbow_animation(pin_obj, pixel_length, strip_name):
@@ -59,19 +53,28 @@ def rainbow_animation(pin_obj, pixel_length, strip_name):
         print(
             f"Starting rainbow animation on {strip_name} ({pixel_length} pixels)")
 
+        # Bind hot lookups to locals once instead of resolving them every frame
+        wheel_lut = SCALED_WHEEL_LUT
+        show = pixels.show
+        sleep = time.sleep
+        monotonic = time.monotonic
+        pixel_phases = rainbow_phases(pixel_length)
+
         frame = 0
+        next_frame = monotonic()
         while True:
             # Update all pixels for this frame
-            for i in range(pixel_length):
-                pixel_index = (i * 256 // pixel_length) + frame * 2
-                r, g, b = wheel(pixel_index & 255)
-                pixels[i] = (int(r * BRIGHTNESS),
-                             int(g * BRIGHTNESS), int(b * BRIGHTNESS))
+            offset = frame * 2
+            pixels[:] = [wheel_lut[(phase + offset) & 255] for phase in pixel_phases]
 
-            pixels.show()
+            show()
             # Reset frame counter to prevent overflow
             frame = (frame + 1) % 256
-            time.sleep(0.05)  # Control animation speed
+
+            # Sleep until the next frame deadline so render time does not add drift,
+            # but never try to catch up on frames that overran
+            next_frame = max(next_frame + FRAME_DELAY, monotonic())
+            sleep(max(0, next_frame - monotonic()))
 
     except KeyboardInterrupt:
         print(f"\n{strip_name} animation stopped by user")